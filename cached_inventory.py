@@ -0,0 +1,244 @@
+import copy
+import hashlib
+import os
+import pickle
+import nornir
+from nornir.core.inventory import Hosts, Inventory
+from nornir.core.plugins.inventory import InventoryPluginRegister
+from nornir.plugins.inventory.simple import SimpleInventory
+
+# Bump whenever the layout of the cached payload changes
+CACHE_VERSION = 2
+
+# Pickled Host/Group/Defaults objects are only valid for the Nornir that wrote them
+NORNIR_VERSION = getattr(nornir, "__version__", None)
+
+# Host data fields that get a secondary index
+DATA_INDEXES = ("hotel_code", "country", "vendor")
+
+
+def _index_key(value):
+    """
+    Normalises a value so lookups are case-insensitive (e.g. HA550 vs ha550).
+    """
+    return str(value).casefold()
+
+
+def _file_stamp(path):
+    """
+    Returns (mtime_ns, size) for a file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _file_digest(path):
+    """
+    Returns the sha256 of a file's contents, or None if it does not exist.
+    """
+    if not os.path.exists(path):
+        return None
+    with open(path, "rb") as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def build_indexes(hosts):
+    """
+    Builds the secondary indexes: field -> value -> list of host names.
+    """
+    indexes = {field: {} for field in DATA_INDEXES + ("group", "hostname")}
+    for name, host in hosts.items():
+        for field in DATA_INDEXES:
+            value = host.get(field)
+            if value is not None:
+                indexes[field].setdefault(_index_key(value), []).append(name)
+        for group in host.extended_groups():
+            indexes["group"].setdefault(_index_key(group.name), []).append(name)
+        if host.hostname:
+            indexes["hostname"].setdefault(_index_key(host.hostname), []).append(name)
+    return indexes
+
+
+class IndexedInventory(Inventory):
+    """
+    Nornir inventory carrying secondary indexes for O(1) host lookups.
+
+    The indexes are built on first use rather than at load time, so they see
+    the hosts after InitNornir has applied any inventory transform_function.
+    """
+
+    def __init__(self, *args, indexes=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indexes = indexes
+
+    @property
+    def indexes(self):
+        if self._indexes is None:
+            self._indexes = build_indexes(self.hosts)
+        return self._indexes
+
+    def lookup(self, field, value):
+        """
+        Returns the names of the hosts whose indexed field matches value.
+        """
+        if field == "name":
+            return [value] if value in self.hosts else []
+        if field not in self.indexes:
+            raise KeyError(f"'{field}' is not indexed, choose from: {', '.join(self.indexes)}")
+        return list(self.indexes[field].get(_index_key(value), []))
+
+    def subset(self, **criteria):
+        """
+        Returns an inventory with only the hosts matching every criterion,
+        e.g. subset(hotel_code="ha550", group="switch").
+        """
+        names = None
+        for field, value in criteria.items():
+            matches = self.lookup(field, value)
+            if names is None:
+                names = matches
+            else:
+                matched = set(matches)
+                names = [name for name in names if name in matched]
+        if names is None:
+            names = list(self.hosts)
+        hosts = Hosts({name: self.hosts[name] for name in names})
+        return IndexedInventory(hosts=hosts, groups=self.groups, defaults=self.defaults)
+
+
+class CachedInventory:
+    """
+    Drop-in replacement for SimpleInventory that keeps a compiled (pickled)
+    copy of hosts/groups/defaults next to the YAML files. The cache is reused
+    while the YAML files are unchanged (mtime/size, falling back to sha256)
+    and rebuilt from SimpleInventory otherwise. The indexes are not cached;
+    IndexedInventory builds them in one pass on first use.
+    """
+
+    def __init__(
+        self,
+        host_file="hosts.yaml",
+        group_file="groups.yaml",
+        defaults_file="defaults.yaml",
+        encoding="utf-8",
+        cache_file=None,
+    ):
+        self.host_file = os.path.expanduser(host_file)
+        self.group_file = os.path.expanduser(group_file)
+        self.defaults_file = os.path.expanduser(defaults_file)
+        self.encoding = encoding
+        if cache_file is None:
+            cache_file = os.path.join(os.path.dirname(self.host_file), ".inventory_cache.pickle")
+        self.cache_file = os.path.expanduser(cache_file)
+
+    @property
+    def sources(self):
+        return (self.host_file, self.group_file, self.defaults_file)
+
+    def load(self):
+        cached = self._read_cache()
+        if cached is None:
+            cached = self._compile()
+        hosts, groups, defaults = cached["inventory"]
+        return IndexedInventory(hosts=hosts, groups=groups, defaults=defaults)
+
+    def _read_cache(self):
+        """
+        Returns the cached payload if it is still valid for the YAML files, else None.
+        """
+        # A corrupt, truncated or foreign pickle of any kind is just a cache miss
+        try:
+            with open(self.cache_file, "rb") as file:
+                cached = pickle.load(file)
+            return self._validate_cache(cached)
+        except Exception:
+            return None
+
+    def _validate_cache(self, cached):
+        if (
+            cached.get("version") != CACHE_VERSION
+            or cached.get("nornir_version") != NORNIR_VERSION
+            or cached.get("encoding") != self.encoding
+        ):
+            return None
+
+        files = cached.get("files", {})
+        if set(files) != set(self.sources):
+            return None
+        restamped = False
+        for path in self.sources:
+            stamp, digest = files[path]
+            current = _file_stamp(path)
+            if current == stamp:
+                continue
+            # Touched but possibly unchanged (git checkout, copy); compare contents
+            if _file_digest(path) != digest:
+                return None
+            files[path] = (current, digest)
+            restamped = True
+        if restamped:
+            self._write_cache(cached)
+        return cached
+
+    def _compile(self):
+        """
+        Parses the YAML through SimpleInventory and writes the cache.
+        """
+        # Stamp before parsing so an edit made during the parse invalidates the cache
+        files = {path: (_file_stamp(path), _file_digest(path)) for path in self.sources}
+        inventory = SimpleInventory(
+            host_file=self.host_file,
+            group_file=self.group_file,
+            defaults_file=self.defaults_file,
+            encoding=self.encoding,
+        ).load()
+        cached = {
+            "version": CACHE_VERSION,
+            "nornir_version": NORNIR_VERSION,
+            "encoding": self.encoding,
+            "files": files,
+            "inventory": (
+                inventory.hosts,
+                inventory.groups,
+                inventory.defaults,
+            ),
+        }
+        self._write_cache(cached)
+        return cached
+
+    def _write_cache(self, cached):
+        """
+        Writes the cache atomically; a read-only directory just means no cache.
+        """
+        tmp_file = f"{self.cache_file}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_file, "wb") as file:
+                pickle.dump(cached, file, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, self.cache_file)
+        except OSError as e:
+            print(f"Warning: could not write inventory cache '{self.cache_file}': {e}")
+            if os.path.exists(tmp_file):
+                os.remove(tmp_file)
+
+
+def filter_indexed(nr, **criteria):
+    """
+    Index-backed counterpart of nr.filter(), e.g. filter_indexed(nr, hotel_code="ha550").
+    Unlike nr.filter(), values match case-insensitively, so hotel_code="HA550"
+    also selects hosts stored as "ha550". The result can be filtered again.
+
+    nr.filter() hands back a plain Inventory; that is wrapped and indexed on
+    the spot, which costs one pass over its hosts.
+    """
+    inventory = nr.inventory
+    if not isinstance(inventory, IndexedInventory):
+        inventory = IndexedInventory(hosts=inventory.hosts, groups=inventory.groups, defaults=inventory.defaults)
+    filtered = copy.copy(nr)
+    filtered.inventory = inventory.subset(**criteria)
+    return filtered
+
+
+InventoryPluginRegister.register("CachedInventory", CachedInventory)
@@ -1,8 +1,9 @@
 import os
 from nornir import InitNornir
+from cached_inventory import filter_indexed  # also registers the CachedInventory plugin used in config.yaml
 from nornir_utils.plugins.functions import print_result
 from nornir_netmiko.tasks import netmiko_send_command
-from datetime import datetime
+from report_store import ReportProcessor, ReportWriter
 
 # Initialize Nornir
 nr = InitNornir(config_file="config.yaml")
@@ -11,6 +12,8 @@ nr.inventory.defaults.username = username
 password = getpass.getpass()
 nr.inventory.defaults.password = password
 hotel_code = input("Please enter hotel code: ")
+# Only run against the switches of the chosen hotel (before the defaults below can match every host)
+nr = filter_indexed(nr, hotel_code=hotel_code)
 nr.inventory.defaults.data = {"hotel_code": hotel_code}
 
 def load_hardening_requirements(file_path):
@@ -40,25 +43,6 @@ def check_hardening(task, hardening_commands):
     # Store the missing requirements in the host's data
     task.host["missing_requirements"] = missing_requirements
 
-def generate_report(nr):
-    """
-    Generates a report of switches missing the required hardening configurations.
-    """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = f"hardening_report_{timestamp}.txt"
-
-    with open(report_file, "w") as file:
-        for host in nr.inventory.hosts.values():
-            missing = host.get("missing_requirements", [])
-            if missing:
-                file.write(f"Switch: {host.name}\n")
-                file.write("Missing Configurations:\n")
-                for config in missing:
-                    file.write(f"  - {config}\n")
-                file.write("\n")
-
-    print(f"Report generated: {report_file}")
-
 def main():
     # Load hardening requirements from the text file
     hardening_file = "hardening.txt"
@@ -67,13 +51,12 @@ def main():
         print("No hardening requirements loaded. Exiting.")
         return
 
-    # Run the hardening check on all switches
+    # Run the hardening check on all switches, streaming each switch into the report as it completes
     print("Checking switches for hardening compliance...")
-    result = nr.run(task=check_hardening, hardening_commands=hardening_commands)
+    with ReportWriter("hardening") as writer:
+        processor = ReportProcessor(writer, lambda host: host.get("missing_requirements", []))
+        result = nr.with_processors([processor]).run(task=check_hardening, hardening_commands=hardening_commands)
     print_result(result)
 
-    # Generate a compliance report
-    generate_report(nr)
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
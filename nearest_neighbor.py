@@ -1,5 +1,6 @@
 import importlib
 from nornir import InitNornir
+from cached_inventory import filter_indexed  # also registers the CachedInventory plugin used in config.yaml
 from nornir_utils.plugins.functions import print_result
 from nornir_netmiko.tasks.netmiko_send_command import netmiko_send_command
 from datetime import date
@@ -16,6 +17,8 @@ nr.inventory.defaults.username = username
 password = getpass.getpass()
 nr.inventory.defaults.password = password
 hotel_code = input("Please enter hotel code: ")
+# Only run against the switches of the chosen hotel (before the defaults below can match every host)
+nr = filter_indexed(nr, hotel_code=hotel_code)
 nr.inventory.defaults.data = {"hotel_code": hotel_code}
 
 # Function to gather spanning tree data
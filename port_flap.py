@@ -1,9 +1,11 @@
 from nornir import InitNornir
+from cached_inventory import filter_indexed  # also registers the CachedInventory plugin used in config.yaml
 from nornir_netmiko.tasks import netmiko_send_command
 from nornir_utils.plugins.functions import print_result
 import re
 from datetime import datetime, timedelta
 import getpass
+from report_store import ReportProcessor, ReportWriter
 
 # Initialize Nornir
 nr = InitNornir(config_file="config.yaml")
@@ -12,6 +14,8 @@ nr.inventory.defaults.username = username
 password = getpass.getpass()
 nr.inventory.defaults.password = password
 hotel_code = input("Please enter hotel code: ")
+# Only run against the switches of the chosen hotel (before the defaults below can match every host)
+nr = filter_indexed(nr, hotel_code=hotel_code)
 nr.inventory.defaults.data = {"hotel_code": hotel_code}
 
 # Define the time range for analysis (last 24 hours)
@@ -56,32 +60,13 @@ def parse_logs(task):
     # Save results in host data
     task.host["flapped_interfaces"] = flapped_interfaces
 
-def generate_report(nr):
-    """
-    Generates a report of switches and interfaces that flapped more than 10 times.
-    """
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-    report_file = f"flap_report_{timestamp}.txt"
-
-    with open(report_file, "w") as file:
-        for host in nr.inventory.hosts.values():
-            flapped_interfaces = host.get("flapped_interfaces", {})
-            if flapped_interfaces:
-                file.write(f"Switch: {host.name}\n")
-                file.write("Flapped Interfaces:\n")
-                for interface, count in flapped_interfaces.items():
-                    file.write(f"  - {interface}: {count} flaps\n")
-                file.write("\n")
-
-    print(f"Report generated: {report_file}")
-
 def main():
     print("Analyzing logs for interface flapping...")
-    result = nr.run(task=parse_logs)
+    # Stream each switch's flapped interfaces into the report as it completes
+    with ReportWriter("flap") as writer:
+        processor = ReportProcessor(writer, lambda host: host.get("flapped_interfaces", {}))
+        result = nr.with_processors([processor]).run(task=parse_logs)
     print_result(result)
 
-    # Generate and save the report
-    generate_report(nr)
-
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,411 @@
+import argparse
+import json
+import os
+import threading
+from datetime import date, datetime, timedelta
+
+# Each report kind lives in its own directory:
+#   reports/<kind>/<run_id>.jsonl  one line per host, appended as hosts complete
+#   reports/<kind>/<run_id>.open   marker holding the writer's pid while the run is in progress
+#   reports/<kind>/index.jsonl     one compact line per run (host count, failed and flagged hosts only)
+REPORT_DIR = "reports"
+
+# Records are flushed one by one but only synced to disk every so often (and on close)
+FSYNC_EVERY = 100
+
+# How `show` renders each report kind, matching the old text reports
+REPORT_FORMATS = {
+    "hardening": ("Missing Configurations", "  - {item}"),
+    "flap": ("Flapped Interfaces", "  - {item}: {detail} flaps"),
+}
+
+
+def _kind_dir(kind, report_dir=REPORT_DIR):
+    return os.path.join(report_dir, kind)
+
+
+def _index_file(kind, report_dir=REPORT_DIR):
+    return os.path.join(_kind_dir(kind, report_dir), "index.jsonl")
+
+
+def _append_line(path, record):
+    """
+    Appends one JSON record to a JSONL file and syncs it to disk.
+    """
+    with open(path, "a") as file:
+        file.write(json.dumps(record, sort_keys=True) + "\n")
+        file.flush()
+        os.fsync(file.fileno())
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _run_in_progress(marker):
+    """
+    True if the run's .open marker belongs to a process that is still running.
+    """
+    try:
+        with open(marker, "r") as file:
+            return _pid_alive(int(file.read().strip()))
+    except (OSError, ValueError):
+        return False
+
+
+def iter_records(path):
+    """
+    Yields the records of a JSONL file one at a time, skipping a truncated last line.
+    """
+    if not os.path.exists(path):
+        return
+    with open(path, "r") as file:
+        for line in file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue
+
+
+class ReportWriter:
+    """
+    Streams per-host results of one run into an append-only JSONL file and
+    records a compact summary of the run in the kind's index when closed.
+    """
+
+    def __init__(self, kind, report_dir=REPORT_DIR):
+        self.kind = kind
+        self.report_dir = report_dir
+        self.started = datetime.now()
+        os.makedirs(_kind_dir(kind, report_dir), exist_ok=True)
+
+        # Claim the run file exclusively so two runs started in the same second never share it
+        timestamp = self.started.strftime("%Y%m%d_%H%M%S")
+        suffix = 0
+        while True:
+            self.run_id = f"{timestamp}_{suffix}" if suffix else timestamp
+            self.report_file = os.path.join(_kind_dir(kind, report_dir), f"{self.run_id}.jsonl")
+            try:
+                self._file = open(self.report_file, "x")
+                break
+            except FileExistsError:
+                suffix += 1
+        self.marker_file = os.path.join(_kind_dir(kind, report_dir), f"{self.run_id}.open")
+        with open(self.marker_file, "w") as marker:
+            marker.write(str(os.getpid()))
+
+        self.hosts = 0
+        self.failed = []
+        self.flagged = {}
+        self._unsynced = 0
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def write(self, host, items, failed=False, error=None, **extra):
+        """
+        Records the result for one host. items is what the report flags on the host,
+        a list (missing configs) or an {item: detail} dict (interface: flap count);
+        an empty one means the host is clean.
+        """
+        record = {
+            "run_id": self.run_id,
+            "time": datetime.now().isoformat(timespec="seconds"),
+            "host": host,
+            "failed": failed,
+            "items": items,
+        }
+        if error:
+            record["error"] = error
+        record.update(extra)
+        line = json.dumps(record, sort_keys=True) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= FSYNC_EVERY:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+            self.hosts += 1
+            if failed:
+                self.failed.append(host)
+            elif items:
+                self.flagged[host] = sorted(items)
+
+    def close(self, complete=True):
+        """
+        Appends this run's summary to the index; the run then shows up in queries.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            _append_line(
+                _index_file(self.kind, self.report_dir),
+                {
+                    "run_id": self.run_id,
+                    "started": self.started.isoformat(timespec="seconds"),
+                    "finished": datetime.now().isoformat(timespec="seconds"),
+                    "file": os.path.basename(self.report_file),
+                    "complete": complete,
+                    "hosts": self.hosts,
+                    "failed": sorted(self.failed),
+                    "flagged": self.flagged,
+                },
+            )
+            os.remove(self.marker_file)
+        print(f"Report generated: {self.report_file}")
+        print(f"View it with: python report_store.py show {self.kind} {self.run_id}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close(complete=exc_type is None)
+
+
+class ReportProcessor:
+    """
+    Nornir processor that hands each host's result to a ReportWriter as soon as
+    the host finishes, instead of waiting for the whole run.
+    """
+
+    def __init__(self, writer, extract):
+        # extract(host) -> items flagged on the host, read from the host data set by the task
+        self.writer = writer
+        self.extract = extract
+
+    def task_started(self, task):
+        pass
+
+    def task_completed(self, task, result):
+        pass
+
+    def task_instance_started(self, task, host):
+        pass
+
+    def task_instance_completed(self, task, host, result):
+        hotel_code = host.get("hotel_code")
+        if result.failed:
+            self.writer.write(host.name, [], failed=True, error=str(result.exception), hotel_code=hotel_code)
+        else:
+            self.writer.write(host.name, self.extract(host), hotel_code=hotel_code)
+
+    def subtask_instance_started(self, task, host):
+        pass
+
+    def subtask_instance_completed(self, task, host, result):
+        pass
+
+
+def _run_files(kind, report_dir=REPORT_DIR):
+    """
+    Returns the run file names of a kind, oldest first (run ids sort by time).
+    """
+    if not os.path.isdir(_kind_dir(kind, report_dir)):
+        return []
+    return sorted(
+        name
+        for name in os.listdir(_kind_dir(kind, report_dir))
+        if name.endswith(".jsonl") and name != "index.jsonl"
+    )
+
+
+def reindex(kind, report_dir=REPORT_DIR):
+    """
+    Adds runs that never reached close() (crashed or interrupted) to the index,
+    marked incomplete, so their partial results still count in queries. Runs
+    whose writer is still alive are left alone.
+    """
+    indexed = {entry["file"] for entry in iter_records(_index_file(kind, report_dir))}
+    added = 0
+    for name in _run_files(kind, report_dir):
+        if name in indexed:
+            continue
+        marker = os.path.join(_kind_dir(kind, report_dir), name[: -len(".jsonl")] + ".open")
+        if _run_in_progress(marker):
+            continue
+        hosts, failed, flagged, run_id, times = 0, [], {}, None, []
+        for record in iter_records(os.path.join(_kind_dir(kind, report_dir), name)):
+            hosts += 1
+            run_id = record["run_id"]
+            times.append(record["time"])
+            if record.get("failed"):
+                failed.append(record["host"])
+            elif record.get("items"):
+                flagged[record["host"]] = sorted(record["items"])
+        if run_id is None:
+            continue
+        _append_line(
+            _index_file(kind, report_dir),
+            {
+                "run_id": run_id,
+                "started": min(times),
+                "finished": max(times),
+                "file": name,
+                "complete": False,
+                "hosts": hosts,
+                "failed": sorted(failed),
+                "flagged": flagged,
+            },
+        )
+        if os.path.exists(marker):
+            os.remove(marker)
+        added += 1
+    return added
+
+
+def newly_flagged(kind, since_days, report_dir=REPORT_DIR):
+    """
+    Compares the latest run with the last run at least since_days old (a complete
+    one if there is any) and returns {host: [items]} for items flagged now but not
+    back then. Only hosts the baseline run checked successfully are compared;
+    those are read from the baseline's own run file, not the index. Returns None when there is no run that old to compare against.
+    """
+    cutoff = datetime.now() - timedelta(days=since_days)
+    baseline, partial_baseline, latest = None, None, None
+
+    def newer(entry, than):
+        return than is None or entry["started"] >= than["started"]
+
+    # Reindexed runs are appended out of order, so compare start times
+    for entry in iter_records(_index_file(kind, report_dir)):
+        if datetime.fromisoformat(entry["started"]) <= cutoff:
+            if entry["complete"] and newer(entry, baseline):
+                baseline = entry
+            elif not entry["complete"] and newer(entry, partial_baseline):
+                partial_baseline = entry
+        if newer(entry, latest):
+            latest = entry
+    baseline = baseline or partial_baseline
+    if baseline is None:
+        return None
+
+    baseline_file = os.path.join(_kind_dir(kind, report_dir), baseline["file"])
+    checked = {record["host"] for record in iter_records(baseline_file) if not record.get("failed")}
+    before = baseline["flagged"]
+    newly = {}
+    for host, items in latest["flagged"].items():
+        if host not in checked:
+            continue
+        new_items = sorted(set(items) - set(before.get(host, [])))
+        if new_items:
+            newly[host] = new_items
+    return newly
+
+
+def recurring(kind, days, min_days, report_dir=REPORT_DIR):
+    """
+    Returns {(host, item): day_count} for items flagged on at least min_days of
+    the last days calendar days.
+    """
+    first_day = date.today() - timedelta(days=days - 1)
+    seen = {}
+    for entry in iter_records(_index_file(kind, report_dir)):
+        day = datetime.fromisoformat(entry["started"]).date()
+        if day < first_day:
+            continue
+        for host, items in entry["flagged"].items():
+            for item in items:
+                seen.setdefault((host, item), set()).add(day)
+    return {key: len(days_seen) for key, days_seen in seen.items() if len(days_seen) >= min_days}
+
+
+def show(kind, run_id=None, report_dir=REPORT_DIR):
+    """
+    Prints one run (the latest by default) in the old text report layout,
+    reading the run file line by line.
+    """
+    if run_id is None:
+        run_files = _run_files(kind, report_dir)
+        if not run_files:
+            print(f"No {kind} runs found in '{_kind_dir(kind, report_dir)}'.")
+            return
+        run_id = run_files[-1][: -len(".jsonl")]
+    report_file = os.path.join(_kind_dir(kind, report_dir), f"{run_id}.jsonl")
+    if not os.path.exists(report_file):
+        print(f"Error: Report file '{report_file}' does not exist.")
+        return
+
+    title, item_format = REPORT_FORMATS.get(kind, ("Flagged", "  - {item}"))
+    print(f"Run: {run_id}\n")
+    for record in iter_records(report_file):
+        if record.get("failed"):
+            print(f"Switch: {record['host']}")
+            print(f"Check failed: {record.get('error', 'unknown error')}\n")
+            continue
+        items = record.get("items")
+        if not items:
+            continue
+        print(f"Switch: {record['host']}")
+        print(f"{title}:")
+        if isinstance(items, dict):
+            for item, detail in items.items():
+                print(item_format.format(item=item, detail=detail))
+        else:
+            for item in items:
+                print(item_format.format(item=item, detail=""))
+        print()
+
+
+def main():
+    # Options shared by every subcommand, so they can follow the subcommand
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("kind", help="report kind, e.g. hardening or flap")
+    common.add_argument("--report-dir", default=REPORT_DIR, help=f"reports directory (default {REPORT_DIR})")
+
+    parser = argparse.ArgumentParser(description="Query trends across hardening/flap report runs.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    newly_parser = subparsers.add_parser("newly", parents=[common], help="hosts newly flagged since N days ago")
+    newly_parser.add_argument("--since", type=int, default=7, help="days to look back (default 7)")
+
+    recurring_parser = subparsers.add_parser(
+        "recurring", parents=[common], help="items flagged on M of the last N days"
+    )
+    recurring_parser.add_argument("--days", type=int, default=7, help="window in days (default 7)")
+    recurring_parser.add_argument("--min", type=int, default=5, dest="min_days", help="minimum days flagged (default 5)")
+
+    subparsers.add_parser("reindex", parents=[common], help="index runs that did not finish")
+
+    show_parser = subparsers.add_parser("show", parents=[common], help="print one run as a text report")
+    show_parser.add_argument("run_id", nargs="?", help="run to show (default: latest)")
+
+    args = parser.parse_args()
+
+    if args.command == "newly":
+        newly = newly_flagged(args.kind, args.since, args.report_dir)
+        if newly is None:
+            print(f"No baseline run older than {args.since} days to compare against.")
+        elif not newly:
+            print(f"No hosts newly flagged in the last {args.since} days.")
+        else:
+            for host, items in sorted(newly.items()):
+                print(f"Switch: {host}")
+                for item in items:
+                    print(f"  - {item}")
+    elif args.command == "recurring":
+        found = recurring(args.kind, args.days, args.min_days, args.report_dir)
+        if not found:
+            print(f"Nothing flagged on {args.min_days} of the last {args.days} days.")
+        for (host, item), count in sorted(found.items()):
+            print(f"{host}  {item}: {count}/{args.days} days")
+    elif args.command == "reindex":
+        print(f"Indexed {reindex(args.kind, args.report_dir)} unfinished run(s).")
+    elif args.command == "show":
+        show(args.kind, args.run_id, args.report_dir)
+
+
+if __name__ == "__main__":
+    main()